@@ -1,5 +1,8 @@
 # Define shared constants for the payroll system
 DATABASE_FILE = "payroll.db"  # Name of the SQLite database file
+ARCHIVE_FILE_PATTERN = "payroll_{year}.db"  # Per-year archive files for closed history
+ARCHIVE_RETENTION_YEARS = 1  # Full years kept in the main database besides the current one
+ARCHIVE_ATTACH_BATCH = 9  # Archives attached per read; SQLite allows at most 10 attached databases
 
 # Fields for the employees table (20 fields, excluding pto_accrual_rate which is set to a default value in the database)
 EMPLOYEE_FIELDS = [
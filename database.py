@@ -1,8 +1,10 @@
 import sqlite3
 import hashlib
 import logging
+from glob import glob
 from functools import wraps
 from datetime import datetime
+from config import ARCHIVE_FILE_PATTERN, ARCHIVE_RETENTION_YEARS, ARCHIVE_ATTACH_BATCH
 
 logging.basicConfig(filename='payroll.log', level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
@@ -15,6 +17,7 @@ def db_operation(func):
             logging.info(f"{func.__name__} executed: {args}")
             return result
         except sqlite3.Error as e:
+            self.conn.rollback()
             logging.error(f"Error in {func.__name__}: {e}")
             raise
     return wrapper
@@ -22,6 +25,7 @@ def db_operation(func):
 class EmployeeRepository:
     def __init__(self, db):
         self.db = db
+        self.conn = db.conn
 
     @db_operation
     def insert(self, empData):
@@ -49,6 +53,9 @@ class EmployeeRepository:
 
     @db_operation
     def delete(self, empId):
+        # Closed pay periods are kept intact, whether still in main or already archived
+        if self.db.hasClosedHistory(empId):
+            raise sqlite3.IntegrityError("Employee has time entries in a closed pay period")
         self.db.cursor.execute("DELETE FROM employees WHERE empId = ?", (empId,))
         self.db.cursor.execute("DELETE FROM users WHERE userId = ?", (empId,))
         self.db.cursor.execute("DELETE FROM time_entries WHERE empId = ?", (empId,))
@@ -65,6 +72,7 @@ class EmployeeRepository:
 class PtoRequestRepository:
     def __init__(self, db):
         self.db = db
+        self.conn = db.conn
 
     @db_operation
     def insert(self, requestData):
@@ -135,14 +143,58 @@ class Database:
             ("status", "TEXT"),
             ("requestDate", "TEXT"),
             ("FOREIGN KEY(empId)", "REFERENCES employees(empId)")
+        ],
+        "closed_periods": [
+            ("periodStart", "TEXT"),
+            ("periodEnd", "TEXT"),
+            ("closedDate", "TEXT"),
+            ("PRIMARY KEY(periodStart, periodEnd)", "")
         ]
     }
 
+    # Tables moved to the per-year archive files: the column that decides the year,
+    # and the condition a row must meet against closed_periods c to be archived
+    ARCHIVED_TABLES = {
+        "time_entries": ("date", "time_entries.date BETWEEN c.periodStart AND c.periodEnd"),
+        "payroll": ("periodEnd", "payroll.periodStart >= c.periodStart AND payroll.periodEnd <= c.periodEnd")
+    }
+
+    # Reject writes to time entries that fall inside a closed pay period
+    LOCK_TRIGGERS = {
+        "time_entries_locked_insert": """
+            CREATE TRIGGER IF NOT EXISTS time_entries_locked_insert
+            BEFORE INSERT ON time_entries
+            WHEN EXISTS (SELECT 1 FROM closed_periods WHERE NEW.date BETWEEN periodStart AND periodEnd)
+            BEGIN
+                SELECT RAISE(ABORT, 'Time entry falls in a closed pay period');
+            END
+        """,
+        "time_entries_locked_update": """
+            CREATE TRIGGER IF NOT EXISTS time_entries_locked_update
+            BEFORE UPDATE ON time_entries
+            WHEN EXISTS (SELECT 1 FROM closed_periods
+                         WHERE OLD.date BETWEEN periodStart AND periodEnd
+                            OR NEW.date BETWEEN periodStart AND periodEnd)
+            BEGIN
+                SELECT RAISE(ABORT, 'Time entry falls in a closed pay period');
+            END
+        """,
+        "time_entries_locked_delete": """
+            CREATE TRIGGER IF NOT EXISTS time_entries_locked_delete
+            BEFORE DELETE ON time_entries
+            WHEN EXISTS (SELECT 1 FROM closed_periods WHERE OLD.date BETWEEN periodStart AND periodEnd)
+            BEGIN
+                SELECT RAISE(ABORT, 'Time entry falls in a closed pay period');
+            END
+        """
+    }
+
     def __init__(self):
         self.conn = sqlite3.connect('payroll.db')
         self.cursor = self.conn.cursor()
         self.check_and_fix_users_table()
         self.createTables()
+        self.archivedYears = self.scanArchiveYears()
         self.employees = EmployeeRepository(self)
         self.pto_requests = PtoRequestRepository(self)
 
@@ -163,6 +215,8 @@ class Database:
     def createTables(self):
         for table, fields in self.TABLE_SCHEMAS.items():
             self.cursor.execute(f"CREATE TABLE IF NOT EXISTS {table} ({', '.join(f'{f[0]} {f[1]}' for f in fields)})")
+        for trigger in self.LOCK_TRIGGERS.values():
+            self.cursor.execute(trigger)
         self.conn.commit()
 
     def is_employees_empty(self):
@@ -185,37 +239,58 @@ class Database:
         self.cursor.execute("INSERT INTO time_entries VALUES (?, ?, ?, ?, ?)", entryData)
 
     def getTimeEntries(self, empId, startDate, endDate):
-        query = "SELECT * FROM time_entries WHERE empId = ? AND date BETWEEN ? AND ?"
-        self.cursor.execute(query, (empId, startDate, endDate))
-        return self.cursor.fetchall()
+        query = "SELECT * FROM {source} WHERE empId = ? AND date BETWEEN ? AND ?"
+        return self.readHistory("time_entries", startDate, endDate, query, (empId, startDate, endDate))
 
     @db_operation
     def lockTimeEntries(self, startDate, endDate):
-        self.cursor.execute("UPDATE time_entries SET hours_worked = hours_worked WHERE date BETWEEN ? AND ?", (startDate, endDate))
+        # Closing a period is a single row; the triggers enforce the lock
+        closedDate = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        self.cursor.execute("INSERT OR IGNORE INTO closed_periods VALUES (?, ?, ?)", (startDate, endDate, closedDate))
+
+    def isPeriodLocked(self, startDate, endDate):
+        query = "SELECT 1 FROM closed_periods WHERE periodStart <= ? AND periodEnd >= ?"
+        self.cursor.execute(query, (startDate, endDate))
+        return self.cursor.fetchone() is not None
+
+    def hasClosedHistory(self, empId):
+        query = """
+            SELECT 1 FROM {source} t WHERE t.empId = ?
+            AND EXISTS (SELECT 1 FROM main.closed_periods c WHERE t.date BETWEEN c.periodStart AND c.periodEnd)
+        """
+        return bool(self.readHistory("time_entries", "0001-01-01", "9999-12-31", query, (empId,)))
 
     @db_operation
     def insertPayroll(self, payrollData):
+        empId, startDate, endDate = payrollData[1:4]
+        if self.isPeriodLocked(startDate, endDate) and self.getPayroll(empId, startDate, endDate):
+            raise sqlite3.IntegrityError("Payroll already recorded for a closed pay period")
         self.cursor.execute("INSERT INTO payroll VALUES (?, ?, ?, ?, ?, ?, ?, ?)", payrollData)
 
+    def getPayroll(self, empId, startDate, endDate):
+        query = "SELECT * FROM {source} WHERE empId = ? AND periodStart = ? AND periodEnd = ?"
+        rows = self.readHistory("payroll", startDate, endDate, query, (empId, startDate, endDate))
+        return rows[0] if rows else None
+
     def getWeeklyHoursBatch(self, startDate, endDate):
         try:
             query = """
                 SELECT e.empId, COALESCE(SUM(t.hoursWorked), 0) as totalHours
                 FROM employees e
-                LEFT JOIN time_entries t ON e.empId = t.empId
+                LEFT JOIN {source} t ON e.empId = t.empId
                 WHERE t.date >= ? AND t.date <= ? AND t.date >= e.hireDate
                 GROUP BY e.empId
             """
-            self.cursor.execute(query, (startDate, endDate))
-            return {row[0]: row[1] or 0.0 for row in self.cursor.fetchall()}
+            rows = self.readHistory("time_entries", startDate, endDate, query, (startDate, endDate))
+            return self.sumByEmployee(rows)
         except Exception as e:
             logging.error(f"Failed to fetch weekly hours batch: {e}")
             return {}
 
     def getYearlyPtoBatch(self, year):
-        query = "SELECT empId, SUM(pto_hours) FROM time_entries WHERE date LIKE ? GROUP BY empId"
-        self.cursor.execute(query, (f"{year}%",))
-        return {row[0]: row[1] or 0.0 for row in self.cursor.fetchall()}
+        query = "SELECT empId, SUM(pto_hours) FROM {source} WHERE date LIKE ? GROUP BY empId"
+        rows = self.readHistory("time_entries", f"{year}-01-01", f"{year}-12-31", query, (f"{year}%",))
+        return self.sumByEmployee(rows)
 
     def getPtoBalance(self, empId):
         self.cursor.execute("SELECT hireDate, pto_accrual_rate FROM employees WHERE empId = ?", (empId,))
@@ -231,5 +306,112 @@ class Database:
         used = self.getYearlyPtoBatch(today.year).get(empId, 0.0)
         return max(0.0, accrued - used)
 
+    def parseYear(self, date):
+        try:
+            return datetime.strptime(str(date), '%Y-%m-%d').year
+        except ValueError:
+            return None
+
+    def scanArchiveYears(self):
+        prefix, suffix = ARCHIVE_FILE_PATTERN.split("{year}")
+        paths = glob(ARCHIVE_FILE_PATTERN.format(year="[0-9][0-9][0-9][0-9]"))
+        return sorted(int(path[len(prefix):-len(suffix) or None]) for path in paths)
+
+    def attachArchive(self, year):
+        alias = f"archive_{year}"
+        self.cursor.execute("ATTACH DATABASE ? AS " + alias, (ARCHIVE_FILE_PATTERN.format(year=year),))
+        return alias
+
+    def createArchiveTables(self, alias):
+        for table in self.ARCHIVED_TABLES:
+            # Foreign keys can't point across database files, so the archive copies drop them
+            fields = self.TABLE_SCHEMAS[table]
+            columns = ', '.join(f'{f[0]} {f[1]}' for f in fields if not f[0].startswith("FOREIGN KEY"))
+            self.cursor.execute(f"CREATE TABLE IF NOT EXISTS {alias}.{table} ({columns})")
+        # Everything archived is closed, so the archive copy rejects changes outright
+        for action in ("UPDATE", "DELETE"):
+            self.cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS {alias}.time_entries_locked_{action.lower()}
+                BEFORE {action} ON time_entries
+                BEGIN
+                    SELECT RAISE(ABORT, 'Time entry falls in a closed pay period');
+                END
+            """)
+
+    def readHistory(self, table, startDate, endDate, query, params):
+        # Main is read once, then the archived years in the range in batches that fit
+        # under SQLite's attached database limit; callers merge aggregates with sumByEmployee
+        self.cursor.execute(query.format(source=f"main.{table}"), params)
+        rows = self.cursor.fetchall()
+        startYear, endYear = self.parseYear(startDate), self.parseYear(endDate)
+        years = [year for year in self.archivedYears
+                 if startYear and endYear and startYear <= year <= endYear]
+        for i in range(0, len(years), ARCHIVE_ATTACH_BATCH):
+            aliases = []
+            try:
+                for year in years[i:i + ARCHIVE_ATTACH_BATCH]:
+                    aliases.append(self.attachArchive(year))
+                # Only temp views may span attached databases
+                sources = [f"SELECT * FROM {alias}.{table}" for alias in aliases]
+                self.cursor.execute(f"CREATE TEMP VIEW {table}_history AS {' UNION ALL '.join(sources)}")
+                self.cursor.execute(query.format(source=f"{table}_history"), params)
+                rows.extend(self.cursor.fetchall())
+            finally:
+                self.cursor.execute(f"DROP VIEW IF EXISTS temp.{table}_history")
+                for alias in aliases:
+                    self.cursor.execute(f"DETACH DATABASE {alias}")
+        return rows
+
+    def sumByEmployee(self, rows):
+        totals = {}
+        for empId, total in rows:
+            totals[empId] = totals.get(empId, 0.0) + (total or 0.0)
+        return totals
+
+    def archiveClosedYears(self):
+        # Only rows inside a closed pay period move; open periods stay in main for late corrections
+        cutoff = f"{datetime.now().year - ARCHIVE_RETENTION_YEARS}-01-01"
+        closed = "EXISTS (SELECT 1 FROM main.closed_periods c WHERE {condition})"
+        years = set()
+        for table, (column, condition) in self.ARCHIVED_TABLES.items():
+            self.cursor.execute(f"SELECT DISTINCT {column} FROM {table} WHERE {column} < ? AND {closed.format(condition=condition)}", (cutoff,))
+            for (date,) in self.cursor.fetchall():
+                year = self.parseYear(date)
+                if year is None:
+                    logging.warning(f"Skipping {table} rows with unparseable date {date!r} during archiving")
+                else:
+                    years.add(year)
+        moved = 0
+        # One year at a time keeps a single archive attached, well under SQLite's limit
+        for year in sorted(years):
+            alias = self.attachArchive(year)
+            try:
+                self.createArchiveTables(alias)
+                # Moving locked entries out is the one delete the lock allows; dropping the trigger
+                # inside the transaction means a failed move rolls it back into place
+                self.cursor.execute("BEGIN")
+                self.cursor.execute("DROP TRIGGER time_entries_locked_delete")
+                bounds = (f"{year}-01-01", f"{year + 1}-01-01")
+                for table, (column, condition) in self.ARCHIVED_TABLES.items():
+                    where = f"WHERE {column} >= ? AND {column} < ? AND {closed.format(condition=condition)}"
+                    # A plain INSERT so an id already in the archive aborts the year instead of losing the row
+                    self.cursor.execute(f"INSERT INTO {alias}.{table} SELECT * FROM main.{table} {where}", bounds)
+                    self.cursor.execute(f"DELETE FROM main.{table} {where}", bounds)
+                    moved += self.cursor.rowcount
+                self.cursor.execute(self.LOCK_TRIGGERS["time_entries_locked_delete"])
+                self.conn.commit()
+            except sqlite3.Error:
+                self.conn.rollback()
+                raise
+            finally:
+                self.cursor.execute(f"DETACH DATABASE {alias}")
+            if year not in self.archivedYears:
+                self.archivedYears = sorted(self.archivedYears + [year])
+        if moved:
+            # Hand the freed pages back so the main file shrinks to the active years
+            self.cursor.execute("VACUUM main")
+            logging.info(f"Archived {moved} rows from closed periods before {cutoff}")
+        return moved
+
     def close(self):
         self.conn.close()
\ No newline at end of file
@@ -23,6 +23,12 @@ def initializeData():
         logging.info("Employees table is empty, starting with empty database")
     else:
         logging.info("Employees table already populated, skipping initialization")
+
+    # Move closed years out of the main database so day-to-day queries stay small
+    try:
+        db.archiveClosedYears()
+    except Exception as e:
+        logging.error(f"Failed to archive closed years: {e}")
     db.close()
 
 if __name__ == "__main__":
@@ -0,0 +1,126 @@
+import sqlite3
+import pytest
+from database import Database
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    # Database opens payroll.db in the working directory, so give each test its own
+    monkeypatch.chdir(tmp_path)
+    database = Database()
+    yield database
+    database.close()
+
+def test_lock_is_a_single_row(db):
+    db.insertTimeEntry(("T1", "E1", "2025-03-02", 8.0, 0.0))
+    db.lockTimeEntries("2025-03-01", "2025-03-14")
+    db.cursor.execute("SELECT COUNT(*) FROM closed_periods")
+    assert db.cursor.fetchone()[0] == 1
+    assert db.isPeriodLocked("2025-03-01", "2025-03-14")
+    assert not db.isPeriodLocked("2025-03-01", "2025-03-20")
+
+def test_lock_rejects_insert_update_and_delete(db):
+    db.insertTimeEntry(("T1", "E1", "2025-03-02", 8.0, 0.0))
+    db.lockTimeEntries("2025-03-01", "2025-03-14")
+    with pytest.raises(sqlite3.IntegrityError):
+        db.insertTimeEntry(("T2", "E1", "2025-03-03", 8.0, 0.0))
+    with pytest.raises(sqlite3.IntegrityError):
+        db.cursor.execute("UPDATE time_entries SET hours_worked = 9 WHERE entryId = 'T1'")
+    with pytest.raises(sqlite3.IntegrityError):
+        db.cursor.execute("DELETE FROM time_entries WHERE date = '2025-03-02'")
+    db.insertTimeEntry(("T3", "E1", "2025-03-15", 8.0, 0.0))
+    assert [row[0] for row in db.getTimeEntries("E1", "2025-03-01", "2025-03-31")] == ["T1", "T3"]
+
+def test_rejected_write_leaves_no_open_transaction(db):
+    db.lockTimeEntries("2025-03-01", "2025-03-14")
+    with pytest.raises(sqlite3.IntegrityError):
+        db.insertTimeEntry(("T1", "E1", "2025-03-03", 8.0, 0.0))
+    assert not db.conn.in_transaction
+
+def test_employee_delete_is_atomic_when_entries_are_locked(db):
+    db.cursor.execute("INSERT INTO employees (empId, firstName) VALUES ('E1', 'Ann')")
+    db.insertTimeEntry(("T1", "E1", "2025-03-02", 8.0, 0.0))
+    db.lockTimeEntries("2025-03-01", "2025-03-14")
+    with pytest.raises(sqlite3.IntegrityError):
+        db.employees.delete("E1")
+    assert db.employees.get("E1") is not None
+
+def test_employee_delete_is_blocked_after_archiving(db):
+    db.cursor.execute("INSERT INTO employees (empId, firstName) VALUES ('E1', 'Ann')")
+    db.insertTimeEntry(("T1", "E1", "2019-03-02", 8.0, 0.0))
+    db.lockTimeEntries("2019-03-01", "2019-03-14")
+    db.archiveClosedYears()
+    with pytest.raises(sqlite3.IntegrityError):
+        db.employees.delete("E1")
+    assert db.employees.get("E1") is not None
+    assert len(db.getTimeEntries("E1", "2019-01-01", "2019-12-31")) == 1
+
+def test_employee_without_closed_history_can_be_deleted(db):
+    db.cursor.execute("INSERT INTO employees (empId, firstName) VALUES ('E1', 'Ann')")
+    db.insertTimeEntry(("T1", "E1", "2025-03-02", 8.0, 0.0))
+    db.employees.delete("E1")
+    assert db.employees.get("E1") is None
+    assert db.getTimeEntries("E1", "2025-01-01", "2025-12-31") == []
+
+def test_locked_period_payroll_is_reused(db):
+    db.insertPayroll(("P1", "E1", "2025-03-01", "2025-03-14", 800.0, 600.0, "{}", "Processed"))
+    db.lockTimeEntries("2025-03-01", "2025-03-14")
+    assert db.getPayroll("E1", "2025-03-01", "2025-03-14")[0] == "P1"
+
+def test_archive_moves_only_closed_periods(db):
+    db.insertTimeEntry(("T1", "E1", "2020-03-02", 8.0, 1.0))
+    db.insertTimeEntry(("T2", "E1", "2020-12-30", 8.0, 0.0))
+    db.insertPayroll(("P1", "E1", "2020-03-01", "2020-03-14", 800.0, 600.0, "{}", "Processed"))
+    db.lockTimeEntries("2020-03-01", "2020-03-14")
+    assert db.archiveClosedYears() == 2
+    assert db.archivedYears == [2020]
+    db.cursor.execute("SELECT entryId FROM time_entries")
+    assert db.cursor.fetchall() == [("T2",)]
+    db.cursor.execute("PRAGMA database_list")
+    assert [row[1] for row in db.cursor.fetchall()] == ["main"]
+
+def test_archived_rows_are_still_readable(db):
+    db.insertTimeEntry(("T1", "E1", "2020-03-02", 8.0, 2.0))
+    db.insertPayroll(("P1", "E1", "2020-03-01", "2020-03-14", 800.0, 600.0, "{}", "Processed"))
+    db.lockTimeEntries("2020-03-01", "2020-03-14")
+    db.archiveClosedYears()
+    db.close()
+    reopened = Database()
+    try:
+        assert [row[0] for row in reopened.getTimeEntries("E1", "2020-01-01", "2020-12-31")] == ["T1"]
+        assert reopened.getYearlyPtoBatch(2020) == {"E1": 2.0}
+        assert reopened.getPayroll("E1", "2020-03-01", "2020-03-14")[0] == "P1"
+        with pytest.raises(sqlite3.IntegrityError):
+            reopened.insertPayroll(("P2", "E1", "2020-03-01", "2020-03-14", 800.0, 600.0, "{}", "Processed"))
+        reopened.cursor.execute("PRAGMA database_list")
+        assert not [row[1] for row in reopened.cursor.fetchall() if row[1].startswith("archive_")]
+    finally:
+        reopened.close()
+
+def test_archive_handles_more_years_than_attach_limit(db):
+    for year in range(2005, 2022):
+        db.insertTimeEntry((f"T{year}", "E1", f"{year}-03-02", 8.0, 1.0))
+        db.lockTimeEntries(f"{year}-03-01", f"{year}-03-14")
+    assert db.archiveClosedYears() == 17
+    db.insertTimeEntry(("T2021b", "E1", "2021-12-30", 8.0, 1.0))
+    assert len(db.getTimeEntries("E1", "2015-01-01", "2016-12-31")) == 2
+    assert len(db.getTimeEntries("E1", "2005-01-01", "2021-12-31")) == 18
+    assert db.getYearlyPtoBatch(2021) == {"E1": 2.0}
+
+def test_archive_id_collision_keeps_the_row_in_main(db):
+    db.insertTimeEntry(("T1", "E1", "2019-03-02", 8.0, 0.0))
+    db.lockTimeEntries("2019-03-01", "2019-03-14")
+    db.archiveClosedYears()
+    db.insertTimeEntry(("T1", "E1", "2019-06-02", 8.0, 0.0))
+    db.lockTimeEntries("2019-06-01", "2019-06-14")
+    with pytest.raises(sqlite3.IntegrityError):
+        db.archiveClosedYears()
+    db.cursor.execute("SELECT date FROM time_entries WHERE entryId = 'T1'")
+    assert db.cursor.fetchall() == [("2019-06-02",)]
+    db.cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'time_entries_locked_delete'")
+    assert db.cursor.fetchone() is not None
+
+def test_bad_dates_do_not_break_archiving_or_reads(db):
+    db.insertTimeEntry(("T1", "E1", "03/01/2020", 8.0, 0.0))
+    db.lockTimeEntries("03/01/2020", "03/14/2020")
+    assert db.archiveClosedYears() == 0
+    assert db.getTimeEntries("E1", "03/01/2020", "03/14/2020") == [("T1", "E1", "03/01/2020", 8.0, 0.0)]
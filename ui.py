@@ -255,6 +255,7 @@ class PayrollUI:
         end_date_entry.pack(pady=5)
         
         tk.Button(self.root, text="Calculate Payroll", command=lambda: self.calculate_payroll(emp_id_entry.get(), start_date_entry.get(), end_date_entry.get())).pack(pady=10)
+        tk.Button(self.root, text="Close Pay Period", command=lambda: self.close_pay_period(start_date_entry.get(), end_date_entry.get())).pack(pady=5)
         tk.Button(self.root, text="Back", command=self.show_dashboard).pack(pady=5)
 
     def calculate_payroll(self, emp_id, start_date, end_date):
@@ -263,17 +264,40 @@ class PayrollUI:
             messagebox.showerror("Error", "Employee not found")
             return
         try:
-            time_entries = self.db.getTimeEntries(emp_id, start_date, end_date)
-            strategy = self.salary_strategy if len(emp) > 14 and emp[14] == "Salary" else self.hourly_strategy
-            gross_pay, net_pay, deductions, employer_deductions = strategy.calculate(emp, time_entries)
-            payroll_id = f"P{uuid.uuid4().hex[:8]}"
-            deductions_str = str(deductions)
-            payroll_data = (payroll_id, emp_id, start_date, end_date, gross_pay, net_pay, deductions_str, "Processed")
-            self.db.insertPayroll(payroll_data)
+            # Locked periods can't change, so reuse the stored result instead of recomputing
+            existing = self.db.getPayroll(emp_id, start_date, end_date) if self.db.isPeriodLocked(start_date, end_date) else None
+            if existing:
+                _, _, _, _, gross_pay, net_pay, deductions, _ = existing
+            else:
+                time_entries = self.db.getTimeEntries(emp_id, start_date, end_date)
+                strategy = self.salary_strategy if len(emp) > 14 and emp[14] == "Salary" else self.hourly_strategy
+                gross_pay, net_pay, deductions, employer_deductions = strategy.calculate(emp, time_entries)
+                payroll_id = f"P{uuid.uuid4().hex[:8]}"
+                deductions_str = str(deductions)
+                payroll_data = (payroll_id, emp_id, start_date, end_date, gross_pay, net_pay, deductions_str, "Processed")
+                self.db.insertPayroll(payroll_data)
             messagebox.showinfo("Payroll Result", f"Gross Pay: ${gross_pay:.2f}\nNet Pay: ${net_pay:.2f}\nDeductions: {deductions}")
         except Exception as e:
             messagebox.showerror("Error", f"Failed to process payroll: {e}")
 
+    def close_pay_period(self, start_date, end_date):
+        try:
+            start = datetime.strptime(start_date, '%Y-%m-%d')
+            end = datetime.strptime(end_date, '%Y-%m-%d')
+        except ValueError:
+            messagebox.showerror("Error", "Dates must be in YYYY-MM-DD format")
+            return
+        if start > end:
+            messagebox.showerror("Error", "Start date must be on or before end date")
+            return
+        if not messagebox.askyesno("Confirm", f"Close pay period {start_date} to {end_date}? Time entries in it can no longer be changed."):
+            return
+        try:
+            self.db.lockTimeEntries(start_date, end_date)
+            messagebox.showinfo("Success", "Pay period closed")
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to close pay period: {e}")
+
     def show_pto_management(self):
         self.clear_window()
         tk.Label(self.root, text="PTO Management", font=("Arial", 16)).pack(pady=20)